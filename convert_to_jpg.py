@@ -5,12 +5,80 @@ The original files are replaced with JPG versions, keeping the same base filenam
 """
 
 import argparse
+import logging
+import os
 import sys
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
 from pathlib import Path
 
+# Keep BLAS/OpenMP pools single-threaded inside the worker processes:
+# N workers x M internal threads would oversubscribe the cores.
+# Must be set before numpy/PIL are imported.
+os.environ.setdefault("OMP_NUM_THREADS", "1")
+os.environ.setdefault("OPENBLAS_NUM_THREADS", "1")
+os.environ.setdefault("MKL_NUM_THREADS", "1")
+
+import numpy as np
 from PIL import Image
+from tqdm import tqdm
+
+try:
+    # libjpeg-turbo's TurboJPEG API skips Pillow's Python layer on JPEG encode
+    from turbojpeg import TJPF_RGB, TurboJPEG
+    _turbo_jpeg = TurboJPEG()
+except Exception:
+    _turbo_jpeg = None
+
+# Skip the decompression-bomb bounds check; comic scans routinely exceed it
+Image.MAX_IMAGE_PIXELS = None
+
+logger = logging.getLogger(__name__)
+
+# Tuple (not set) so filenames can be filtered with a single str.endswith call
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".gif", ".webp", ".bmp", ".tiff")
+
 
-IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".gif", ".webp", ".bmp", ".tiff"}
+def find_image_files(root: Path):
+    """
+    Yield image files under root recursively via os.scandir, which reuses the
+    readdir file type and avoids the extra stat per entry that rglob pays.
+    """
+    stack = [root]
+    while stack:
+        with os.scandir(stack.pop()) as it:
+            for entry in it:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                elif entry.is_file() and entry.name.lower().endswith(IMAGE_EXTENSIONS):
+                    yield Path(entry.path)
+
+
+def _to_rgb_array(img: Image.Image) -> np.ndarray:
+    """
+    Return the image as an RGB numpy array for the TurboJPEG encoder.
+    Palette and RGBA sources are converted with numpy indexing/slicing,
+    which skips Pillow's per-pixel mode dispatch on large images.
+    """
+    if img.mode == "RGB":
+        return np.asarray(img)
+    if img.mode == "P":
+        # Read the pixels first: this forces load(), which also materializes
+        # the palette (on a fresh Image.open it is still in raw form and
+        # palette.tobytes() raises)
+        idx = np.asarray(img, dtype=np.uint8)
+        if img.palette.mode == "RGB":
+            raw = np.frombuffer(img.palette.tobytes(), dtype=np.uint8).reshape(-1, 3)
+            # Indices may exceed a truncated palette; pad to 256 entries
+            # (black), matching Pillow's own convert("RGB") behaviour
+            palette = np.zeros((256, 3), dtype=np.uint8)
+            palette[: len(raw)] = raw
+            return palette[idx]
+        return np.asarray(img.convert("RGB"))
+    if img.mode == "RGBA":
+        # Drop alpha, assuming an opaque background
+        return np.ascontiguousarray(np.asarray(img)[..., :3])
+    return np.asarray(img.convert("RGB"))
 
 
 def convert_image_to_jpg(image_path: Path, base_folder: Path) -> bool:
@@ -22,30 +90,53 @@ def convert_image_to_jpg(image_path: Path, base_folder: Path) -> bool:
     output_path = image_path.with_suffix(".jpg")
     relative_path = image_path.relative_to(base_folder)
     
-    # If already .jpg, check if mode conversion is needed
-    if suffix == ".jpg" or suffix == ".jpeg":
-        return True
-    
+    # Already in .jpg form: nothing to do
+    if suffix == ".jpg":
+        return False
+
+    # A .jpeg only needs its extension normalized -- a rename, not a re-encode
+    if suffix == ".jpeg":
+        try:
+            if output_path.exists():
+                logger.warning("Skipped %s: %s already exists", relative_path, output_path.name)
+                return False
+            os.replace(image_path, output_path)
+            logger.debug("Renamed: %s -> %s", relative_path, output_path.name)
+            return True
+        except OSError as e:
+            logger.warning("Failed to rename %s: %s", relative_path, e)
+            return False
+
     # Convert other formats to JPG
     try:
         img = Image.open(image_path)
-        
-        # Convert to RGB if needed
-        if img.mode in ("RGBA", "P"):
-            img = img.convert("RGB")
-        elif img.mode != "RGB":
-            img = img.convert("RGB")
-        
-        img.save(output_path, "JPEG", quality=85)
+
+        # Write to a sibling tempfile and rename so a crash mid-save can
+        # never leave a truncated .jpg next to a deleted original
+        tmp_path = output_path.with_name(output_path.name + ".tmp")
+        try:
+            if _turbo_jpeg is not None:
+                tmp_path.write_bytes(
+                    _turbo_jpeg.encode(_to_rgb_array(img), quality=85, pixel_format=TJPF_RGB)
+                )
+            else:
+                # Convert to RGB if needed
+                if img.mode != "RGB":
+                    img = img.convert("RGB")
+                img.save(tmp_path, "JPEG", quality=85)
+        except Exception:
+            tmp_path.unlink(missing_ok=True)
+            raise
         img.close()
-        
+        os.replace(tmp_path, output_path)
+
         # Remove original file
         image_path.unlink()
-        print(f"  Converted: {relative_path} -> {output_path.name}")
+        logger.debug("Converted: %s -> %s", relative_path, output_path.name)
         return True
-        
+
     except Exception as e:
-        print(f"  Warning: Failed to convert {relative_path}: {e}")
+        logger.warning("Failed to convert %s: %s", relative_path, e)
         return False
 
 
@@ -61,24 +152,26 @@ def convert_images_in_directory(folder_path: str) -> None:
         sys.exit(1)
     
     # Find all image files in the folder and subfolders recursively
-    image_files = [
-        f for f in folder.rglob("*")
-        if f.is_file() and f.suffix.lower() in IMAGE_EXTENSIONS
-    ]
-    
+    image_files = list(find_image_files(folder))
+
     if not image_files:
         print(f"No images found in folder: {folder_path}")
         return
-    
-    # Sort by full path
-    image_files.sort(key=lambda p: str(p))
+
+    # Sort by full path (str is a C-level key, unlike a lambda)
+    image_files.sort(key=str)
     
     print(f"Found {len(image_files)} images in folder (including subfolders)...")
     
-    converted_count = 0
-    for image_file in image_files:
-        if convert_image_to_jpg(image_file, folder):
-            converted_count += 1
+    # Convert files in parallel, one process per core; the progress bar is
+    # updated from the main process so workers never write to the terminal
+    with ProcessPoolExecutor(max_workers=os.cpu_count()) as executor:
+        results = executor.map(
+            partial(convert_image_to_jpg, base_folder=folder),
+            image_files,
+            chunksize=8,
+        )
+        converted_count = sum(tqdm(results, total=len(image_files), unit="img"))
     
     print(f"\nDone! Converted {converted_count} images.")
 
@@ -93,6 +186,7 @@ def main():
     )
     
     args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
     convert_images_in_directory(args.folder)
 
 
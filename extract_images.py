@@ -6,136 +6,313 @@ Images are saved with sequential names like 0001.jpg, 0002.jpg, etc.
 
 import argparse
 import io
+import logging
+import mmap
+import os
 import shutil
 import sys
 import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from operator import attrgetter
 from pathlib import Path
 
+# Keep BLAS/OpenMP pools single-threaded inside the worker processes:
+# N workers x M internal threads would oversubscribe the cores.
+# Must be set before numpy/PIL/fitz are imported.
+os.environ.setdefault("OMP_NUM_THREADS", "1")
+os.environ.setdefault("OPENBLAS_NUM_THREADS", "1")
+os.environ.setdefault("MKL_NUM_THREADS", "1")
+
 import fitz  # PyMuPDF
 import mobi
+import numpy as np
 from PIL import Image
+from tqdm import tqdm
+
+try:
+    # libjpeg-turbo's TurboJPEG API skips Pillow's Python layer on JPEG encode
+    from turbojpeg import TJPF_RGB, TurboJPEG
+    _turbo_jpeg = TurboJPEG()
+except Exception:
+    _turbo_jpeg = None
+
+# Skip the decompression-bomb bounds check; comic scans routinely exceed it
+Image.MAX_IMAGE_PIXELS = None
+
+logger = logging.getLogger(__name__)
+
+# Tuple (not set) so filenames can be filtered with a single str.endswith call
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".gif", ".webp", ".bmp", ".tiff")
 
-IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".gif", ".webp", ".bmp", ".tiff"}
+
+def find_image_files(root: Path):
+    """
+    Yield image files under root recursively via os.scandir, which reuses the
+    readdir file type and avoids the extra stat per entry that rglob pays.
+    """
+    stack = [root]
+    while stack:
+        with os.scandir(stack.pop()) as it:
+            for entry in it:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                elif entry.is_file() and entry.name.lower().endswith(IMAGE_EXTENSIONS):
+                    yield Path(entry.path)
+
+
+def _to_rgb_array(img: Image.Image) -> np.ndarray:
+    """
+    Return the image as an RGB numpy array for the TurboJPEG encoder.
+    Palette and RGBA sources are converted with numpy indexing/slicing,
+    which skips Pillow's per-pixel mode dispatch on large images.
+    """
+    if img.mode == "RGB":
+        return np.asarray(img)
+    if img.mode == "P":
+        # Read the pixels first: this forces load(), which also materializes
+        # the palette (on a fresh Image.open it is still in raw form and
+        # palette.tobytes() raises)
+        idx = np.asarray(img, dtype=np.uint8)
+        if img.palette.mode == "RGB":
+            raw = np.frombuffer(img.palette.tobytes(), dtype=np.uint8).reshape(-1, 3)
+            # Indices may exceed a truncated palette; pad to 256 entries
+            # (black), matching Pillow's own convert("RGB") behaviour
+            palette = np.zeros((256, 3), dtype=np.uint8)
+            palette[: len(raw)] = raw
+            return palette[idx]
+        return np.asarray(img.convert("RGB"))
+    if img.mode == "RGBA":
+        # Drop alpha, assuming an opaque background
+        return np.ascontiguousarray(np.asarray(img)[..., :3])
+    return np.asarray(img.convert("RGB"))
 
 
 def save_image_as_jpg(image_bytes: bytes, output_path: Path) -> None:
     """Convert image bytes to JPG and save. Skip conversion if already JPEG."""
     img = Image.open(io.BytesIO(image_bytes))
-    
-    # If already JPEG and no mode conversion needed, save original bytes directly
-    if img.format == "JPEG" and img.mode not in ("RGBA", "P"):
-        with open(output_path, "wb") as f:
+
+    # If already JPEG, save original bytes directly
+    if img.format == "JPEG":
+        with open(output_path, "wb", buffering=1 << 20) as f:
             f.write(image_bytes)
         return
-    
-    # Convert to RGB if needed and save as JPEG
-    if img.mode in ("RGBA", "P"):
-        img = img.convert("RGB")
-    img.save(output_path, "JPEG", quality=85)
+
+    if _turbo_jpeg is not None:
+        output_path.write_bytes(
+            _turbo_jpeg.encode(_to_rgb_array(img), quality=85, pixel_format=TJPF_RGB)
+        )
+    else:
+        # Convert to RGB if needed (also covers CMYK scans, which libjpeg
+        # cannot take directly) and save as JPEG
+        if img.mode != "RGB":
+            img = img.convert("RGB")
+        img.save(output_path, "JPEG", quality=85)
+
+
+def save_image_job(image_bytes: bytes, output_path: Path, source_name: str) -> bool:
+    """
+    Process-pool worker: convert image bytes to JPG and save.
+    Returns True on success, False on failure.
+    """
+    try:
+        save_image_as_jpg(image_bytes, output_path)
+        logger.debug("Extracted: %s (%s)", output_path.name, source_name)
+        return True
+    except Exception as e:
+        logger.warning("Failed to extract %s: %s", source_name, e)
+        return False
+
+
+def save_images_parallel(tasks: list[tuple[bytes, Path, str]]) -> int:
+    """Save a batch of (image_bytes, output_path, source_name) tasks in parallel."""
+    if not tasks:
+        return 0
+    # The progress bar is updated from the main process so workers never
+    # write to the terminal
+    with ProcessPoolExecutor(max_workers=os.cpu_count()) as executor:
+        results = executor.map(
+            save_image_job,
+            *zip(*tasks),
+            chunksize=8,
+        )
+        return sum(tqdm(results, total=len(tasks), unit="img"))
+
+
+# Per-worker document handle, set up by _init_pdf_worker
+_worker_doc = None
+
+
+def _init_pdf_worker(file_path: str) -> None:
+    """Pool initializer: each worker opens its own handle on the document."""
+    global _worker_doc
+    _worker_doc = fitz.open(file_path)
+
+
+def extract_pdf_image_job(xref: int, output_path: Path, page_num: int) -> bool:
+    """
+    Process-pool worker: extract one xref from the worker's document.
+    Returns True on success, False on failure.
+    """
+    try:
+        base_image = _worker_doc.extract_image(xref)
+
+        if base_image["ext"] in ("jpg", "jpeg"):
+            # Already-JPEG xrefs are written verbatim, no decode at all
+            output_path.write_bytes(base_image["image"])
+        else:
+            # Re-encode via MuPDF's own JPEG writer, skipping Pillow
+            pix = fitz.Pixmap(_worker_doc, xref)
+            if not pix.colorspace or pix.colorspace.name != "DeviceRGB":
+                pix = fitz.Pixmap(fitz.csRGB, pix)
+            # The colorspace conversion keeps any alpha channel, which the
+            # JPEG writer cannot take -- drop it explicitly
+            if pix.alpha:
+                pix = fitz.Pixmap(pix, 0)
+            try:
+                pix.save(output_path, jpg_quality=85)
+            except Exception:
+                # PyMuPDF builds without JPEG output: wrap the raw samples
+                # buffer zero-copy with Pillow and encode there instead.
+                # Only valid for packed 3-byte RGB samples -- anything else
+                # must surface as a failure, not be encoded wrong.
+                if pix.alpha or pix.n != 3:
+                    raise
+                Image.frombuffer(
+                    "RGB", (pix.width, pix.height), pix.samples, "raw", "RGB", 0, 1
+                ).save(output_path, "JPEG", quality=85)
+            pix = None
+
+        logger.debug("Extracted: %s (page %d)", output_path.name, page_num)
+        return True
+    except Exception as e:
+        logger.warning("Failed to extract image on page %d: %s", page_num, e)
+        return False
 
 
 def extract_images_from_pdf(file_path: Path, output_folder: Path) -> int:
     """Extract images from a PDF file. Returns the number of images extracted."""
     doc = fitz.open(file_path)
-    image_count = 0
-    
+
     print(f"Processing {len(doc)} pages...")
-    
+
+    # Collect (xref, output_path, page_num) tasks first -- metadata only,
+    # no image data is decoded in this pass
+    tasks: list[tuple[int, Path, int]] = []
     for page_num in range(len(doc)):
-        page = doc[page_num]
-        image_list = page.get_images(full=True)
-        
-        for img_index, img_info in enumerate(image_list):
-            xref = img_info[0]
-            
-            try:
-                base_image = doc.extract_image(xref)
-                image_bytes = base_image["image"]
-                
-                image_count += 1
-                image_filename = f"{image_count:04d}.jpg"
-                image_path = output_folder / image_filename
-                
-                save_image_as_jpg(image_bytes, image_path)
-                print(f"  Extracted: {image_filename} (page {page_num + 1})")
-                
-            except Exception as e:
-                print(f"  Warning: Failed to extract image on page {page_num + 1}: {e}")
-    
+        for img_info in doc[page_num].get_images(full=True):
+            image_filename = f"{len(tasks) + 1:04d}.jpg"
+            tasks.append((img_info[0], output_folder / image_filename, page_num + 1))
+
     doc.close()
-    return image_count
+
+    if not tasks:
+        return 0
+
+    # fitz.Document is not picklable, so every worker opens the file itself
+    with ProcessPoolExecutor(
+        max_workers=os.cpu_count(),
+        initializer=_init_pdf_worker,
+        initargs=(str(file_path),),
+    ) as executor:
+        results = executor.map(extract_pdf_image_job, *zip(*tasks), chunksize=16)
+        return sum(tqdm(results, total=len(tasks), unit="img"))
 
 
 def extract_images_from_epub(file_path: Path, output_folder: Path) -> int:
     """Extract images from an EPUB file. Returns the number of images extracted."""
-    image_count = 0
-    
-    with zipfile.ZipFile(file_path, "r") as epub:
+    image_index = 0
+    streamed_count = 0
+    tasks: list[tuple[bytes, Path, str]] = []
+
+    # Large read-ahead buffer on the archive file itself
+    with open(file_path, "rb", buffering=1 << 20) as raw, zipfile.ZipFile(raw) as epub:
         # Get all image files from the EPUB
         image_files = [
             name for name in epub.namelist()
             if Path(name).suffix.lower() in IMAGE_EXTENSIONS
         ]
-        
+
         # Sort to ensure consistent ordering
         image_files.sort()
-        
+
         print(f"Found {len(image_files)} images in EPUB...")
-        
-        for image_name in image_files:
+
+        for image_name in tqdm(image_files, unit="img"):
             try:
-                image_bytes = epub.read(image_name)
-                
-                image_count += 1
-                image_filename = f"{image_count:04d}.jpg"
+                image_index += 1
+                image_filename = f"{image_index:04d}.jpg"
                 image_path = output_folder / image_filename
-                
-                save_image_as_jpg(image_bytes, image_path)
-                print(f"  Extracted: {image_filename} ({image_name})")
-                
+
+                with epub.open(image_name) as src:
+                    head = src.read(3)
+                    if head.startswith(b"\xff\xd8"):
+                        # JPEG SOI marker: stream straight to disk without
+                        # ever materializing the whole entry in memory
+                        with open(image_path, "wb", buffering=1 << 20) as dst:
+                            dst.write(head)
+                            shutil.copyfileobj(src, dst, length=1 << 20)
+                        streamed_count += 1
+                        logger.debug("Extracted: %s (%s)", image_filename, image_name)
+                    else:
+                        tasks.append((head + src.read(), image_path, image_name))
+
             except Exception as e:
-                print(f"  Warning: Failed to extract {image_name}: {e}")
-    
-    return image_count
+                logger.warning("Failed to extract %s: %s", image_name, e)
+
+    return streamed_count + save_images_parallel(tasks)
 
 
 def extract_images_from_zip(file_path: Path, output_folder: Path) -> int:
     """Extract images from a ZIP file. Returns the number of images extracted."""
-    image_count = 0
-    
-    with zipfile.ZipFile(file_path, "r") as zf:
+    image_index = 0
+    streamed_count = 0
+    tasks: list[tuple[bytes, Path, str]] = []
+
+    # Large read-ahead buffer on the archive file itself
+    with open(file_path, "rb", buffering=1 << 20) as raw, zipfile.ZipFile(raw) as zf:
         # Get all image files from the ZIP
         image_files = [
             name for name in zf.namelist()
             if Path(name).suffix.lower() in IMAGE_EXTENSIONS
         ]
-        
+
         # Sort to ensure consistent ordering
         image_files.sort()
-        
+
         print(f"Found {len(image_files)} images in ZIP...")
-        
-        for image_name in image_files:
+
+        for image_name in tqdm(image_files, unit="img"):
             try:
-                image_bytes = zf.read(image_name)
-                
-                image_count += 1
-                image_filename = f"{image_count:04d}.jpg"
+                image_index += 1
+                image_filename = f"{image_index:04d}.jpg"
                 image_path = output_folder / image_filename
-                
-                save_image_as_jpg(image_bytes, image_path)
-                print(f"  Extracted: {image_filename} ({image_name})")
-                
+
+                with zf.open(image_name) as src:
+                    head = src.read(3)
+                    if head.startswith(b"\xff\xd8"):
+                        # JPEG SOI marker: stream straight to disk without
+                        # ever materializing the whole entry in memory
+                        with open(image_path, "wb", buffering=1 << 20) as dst:
+                            dst.write(head)
+                            shutil.copyfileobj(src, dst, length=1 << 20)
+                        streamed_count += 1
+                        logger.debug("Extracted: %s (%s)", image_filename, image_name)
+                    else:
+                        tasks.append((head + src.read(), image_path, image_name))
+
             except Exception as e:
-                print(f"  Warning: Failed to extract {image_name}: {e}")
-    
-    return image_count
+                logger.warning("Failed to extract %s: %s", image_name, e)
+
+    return streamed_count + save_images_parallel(tasks)
 
 
 def extract_images_from_mobi(file_path: Path, output_folder: Path) -> int:
     """Extract images from a MOBI file. Returns the number of images extracted."""
     image_count = 0
-    
+    image_index = 0
+    streamed_count = 0
+    tasks: list[tuple[bytes, Path, str]] = []
+
     # Unpack MOBI file to a temporary directory
     tempdir, extracted_file = mobi.extract(str(file_path))
     tempdir_path = Path(tempdir)
@@ -157,29 +334,38 @@ def extract_images_from_mobi(file_path: Path, output_folder: Path) -> int:
             search_dir = tempdir_path
             print("No mobi7/mobi8 subdirectory found, searching entire directory...")
         
-        # Find all image files in the selected directory
-        image_files = []
-        for ext in IMAGE_EXTENSIONS:
-            image_files.extend(search_dir.rglob(f"*{ext}"))
+        # Find all image files in the selected directory in a single walk
+        # (one readdir pass instead of one rglob per extension)
+        image_files = list(find_image_files(search_dir))
         
-        # Sort by filename to ensure consistent ordering
-        image_files.sort(key=lambda p: p.name)
+        # Sort by filename to ensure consistent ordering (C-level key)
+        image_files.sort(key=attrgetter("name"))
         
         print(f"Found {len(image_files)} images in MOBI...")
-        
+
         for image_file in image_files:
             try:
-                image_bytes = image_file.read_bytes()
-                
-                image_count += 1
-                image_filename = f"{image_count:04d}.jpg"
+                image_index += 1
+                image_filename = f"{image_index:04d}.jpg"
                 image_path = output_folder / image_filename
-                
-                save_image_as_jpg(image_bytes, image_path)
-                print(f"  Extracted: {image_filename} ({image_file.name})")
-                
+
+                # Memory-map the source: already-JPEG files are copied to the
+                # destination straight from the mapping, with no intermediate
+                # bytes object on the heap
+                with open(image_file, "rb") as src:
+                    with mmap.mmap(src.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                        if mm[:2] == b"\xff\xd8":
+                            with open(image_path, "wb", buffering=1 << 20) as dst:
+                                dst.write(mm)
+                            streamed_count += 1
+                            logger.debug("Extracted: %s (%s)", image_filename, image_file.name)
+                        else:
+                            tasks.append((bytes(mm), image_path, image_file.name))
+
             except Exception as e:
-                print(f"  Warning: Failed to extract {image_file.name}: {e}")
+                logger.warning("Failed to extract %s: %s", image_file.name, e)
+
+        image_count = streamed_count + save_images_parallel(tasks)
     finally:
         # Clean up temporary directory
         shutil.rmtree(tempdir_path, ignore_errors=True)
@@ -232,6 +418,7 @@ def main():
     )
     
     args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
     extract_images(args.input_file)
 
 
@@ -5,12 +5,48 @@ The PDF file will be named after the folder and saved in the same parent directo
 """
 
 import argparse
+import io
+import logging
+import os
 import sys
+from operator import attrgetter
 from pathlib import Path
 
+import img2pdf
+import pikepdf
 from PIL import Image
+from tqdm import tqdm
 
-IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".gif", ".webp", ".bmp", ".tiff"}
+# Skip the decompression-bomb bounds check; comic scans routinely exceed it
+Image.MAX_IMAGE_PIXELS = None
+
+logger = logging.getLogger(__name__)
+
+# Tuple (not set) so filenames can be filtered with a single str.endswith call
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".gif", ".webp", ".bmp", ".tiff")
+
+
+def _iter_pages(image_files):
+    """
+    Yield one PDF page source per image, in order: the file path for JPEGs
+    (embedded as-is by img2pdf) or in-memory JPEG bytes for other formats.
+    Each decoded image is released before the next one is opened, so at most
+    one page's pixel data is ever alive.
+    """
+    for image_file in image_files:
+        try:
+            if image_file.suffix.lower() in (".jpg", ".jpeg"):
+                yield str(image_file)
+            else:
+                with Image.open(image_file) as img:
+                    if img.mode != "RGB":
+                        img = img.convert("RGB")
+                    buf = io.BytesIO()
+                    img.save(buf, "JPEG", quality=90)
+                yield buf.getvalue()
+            logger.debug("Loaded: %s", image_file.name)
+        except Exception as e:
+            logger.warning("Failed to load %s: %s", image_file.name, e)
 
 
 def images_to_pdf(folder_path: str) -> None:
@@ -24,61 +60,47 @@ def images_to_pdf(folder_path: str) -> None:
         print(f"Error: Not a directory: {folder_path}")
         sys.exit(1)
     
-    # Find all image files in the folder
-    image_files = [
-        f for f in folder.iterdir()
-        if f.is_file() and f.suffix.lower() in IMAGE_EXTENSIONS
-    ]
+    # Find all image files in the folder (os.scandir avoids restatting)
+    with os.scandir(folder) as it:
+        image_files = [
+            Path(entry.path)
+            for entry in it
+            if entry.is_file() and entry.name.lower().endswith(IMAGE_EXTENSIONS)
+        ]
     
     if not image_files:
         print(f"Error: No images found in folder: {folder_path}")
         sys.exit(1)
     
-    # Sort by filename to ensure consistent ordering
-    image_files.sort(key=lambda p: p.name)
+    # Sort by filename to ensure consistent ordering (C-level key)
+    image_files.sort(key=attrgetter("name"))
     
     print(f"Found {len(image_files)} images in folder...")
     
     # Output PDF path: same parent directory, folder name as filename
     output_pdf = folder.parent / f"{folder.name}.pdf"
     
-    # Load and convert images
-    images: list[Image.Image] = []
-    for image_file in image_files:
-        try:
-            img = Image.open(image_file)
-            # Convert to RGB if necessary (PDF doesn't support RGBA)
-            if img.mode in ("RGBA", "P"):
-                img = img.convert("RGB")
-            elif img.mode != "RGB":
-                img = img.convert("RGB")
-            images.append(img)
-            print(f"  Loaded: {image_file.name}")
-        except Exception as e:
-            print(f"  Warning: Failed to load {image_file.name}: {e}")
-    
-    if not images:
+    # img2pdf needs a concrete sequence, but materializing the generator only
+    # retains paths and compressed JPEG bytes -- never decoded pixel data
+    pages: list[str | bytes] = list(_iter_pages(tqdm(image_files, unit="img")))
+
+    if not pages:
         print("Error: No valid images to convert.")
         sys.exit(1)
-    
-    # Save as PDF
-    first_image = images[0]
-    remaining_images = images[1:] if len(images) > 1 else []
-    
-    first_image.save(
-        output_pdf,
-        "PDF",
-        save_all=True,
-        append_images=remaining_images,
-        resolution=100.0
-    )
-    
-    # Close all images
-    for img in images:
-        img.close()
-    
+
+    # Save as PDF (1MB write buffer cuts write() syscalls on big outputs)
+    with open(output_pdf, "wb", buffering=1 << 20) as f:
+        f.write(img2pdf.convert(pages))
+
+    # Final pikepdf pass: pack the xref table and object headers into object
+    # streams (~5-15% smaller, images untouched). Skipped for very large
+    # files to avoid the memory spike of reloading them.
+    if output_pdf.stat().st_size < 2 << 30:
+        with pikepdf.Pdf.open(output_pdf, allow_overwriting_input=True) as pdf:
+            pdf.save(output_pdf, object_stream_mode=pikepdf.ObjectStreamMode.generate)
+
     print(f"\nDone! Created PDF: {output_pdf}")
-    print(f"Total pages: {len(images)}")
+    print(f"Total pages: {len(pages)}")
 
 
 def main():
@@ -91,6 +113,7 @@ def main():
     )
     
     args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
     images_to_pdf(args.folder)
 
 
@@ -5,57 +5,126 @@ The resized images are saved as JPG format, replacing the original files.
 """
 
 import argparse
+import logging
+import os
 import sys
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
 from pathlib import Path
 
+# Keep BLAS/OpenMP pools single-threaded inside the worker processes:
+# N workers x M internal threads would oversubscribe the cores.
+# Must be set before PIL is imported.
+os.environ.setdefault("OMP_NUM_THREADS", "1")
+os.environ.setdefault("OPENBLAS_NUM_THREADS", "1")
+os.environ.setdefault("MKL_NUM_THREADS", "1")
+
 from PIL import Image
+from tqdm import tqdm
+
+# Skip the decompression-bomb bounds check; comic scans routinely exceed it
+Image.MAX_IMAGE_PIXELS = None
+
+logger = logging.getLogger(__name__)
 
-IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".gif", ".webp", ".bmp", ".tiff"}
+# Tuple (not set) so filenames can be filtered with a single str.endswith call
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".gif", ".webp", ".bmp", ".tiff")
 
 
-def resize_image(image_path: Path, base_folder: Path, target_width: int) -> bool:
+def find_image_files(root: Path):
+    """
+    Yield image files under root recursively via os.scandir, which reuses the
+    readdir file type and avoids the extra stat per entry that rglob pays.
+    """
+    stack = [root]
+    while stack:
+        with os.scandir(stack.pop()) as it:
+            for entry in it:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                elif entry.is_file() and entry.name.lower().endswith(IMAGE_EXTENSIONS):
+                    yield Path(entry.path)
+
+
+def resize_image(
+    image_path: Path,
+    base_folder: Path,
+    target_width: int,
+    force_upscale: bool = False,
+) -> bool:
     """
     Resize an image to the target width while maintaining aspect ratio.
-    Always resize to target width regardless of original size.
-    Returns True if resize was performed, False if failed.
+    JPEGs already at the target width are left untouched, and images narrower
+    than the target are only converted, not upscaled, unless force_upscale.
+    Returns True if the file was processed (or skipped as a no-op), False if failed.
     """
     output_path = image_path.with_suffix(".jpg")
     relative_path = image_path.relative_to(base_folder)
-    
+
     try:
         img = Image.open(image_path)
         original_width, original_height = img.size
-        
-        # Calculate new height maintaining aspect ratio
-        ratio = target_width / original_width
-        target_height = int(original_height * ratio)
-        
-        # Resize image
-        img_resized = img.resize((target_width, target_height), Image.Resampling.LANCZOS)
-        
-        # Convert to RGB if needed
-        if img_resized.mode in ("RGBA", "P"):
-            img_resized = img_resized.convert("RGB")
-        elif img_resized.mode != "RGB":
-            img_resized = img_resized.convert("RGB")
-        
-        img_resized.save(output_path, "JPEG", quality=85)
-        img_resized.close()
+
+        # Idempotent runs: a JPEG already at the target width needs no work
+        if img.format == "JPEG" and original_width == target_width:
+            img.close()
+            logger.debug("Skipped (already %dpx): %s", target_width, relative_path)
+            return True
+
+        # Upscaling a raster image costs quality for no benefit
+        if original_width < target_width and not force_upscale:
+            if img.format == "JPEG":
+                img.close()
+                logger.debug("Skipped (narrower than %dpx): %s", target_width, relative_path)
+                return True
+            # Non-JPEG narrower than target: convert at its own width
+            target_width = original_width
+
+        # Let libjpeg decode at a reduced DCT scale (1/2, 1/4, 1/8) when
+        # shrinking a lot, so LANCZOS has far fewer pixels to filter
+        if img.format == "JPEG":
+            img.draft("RGB", (target_width, target_width * 4))
+
+        # Calculate new height maintaining aspect ratio (from the possibly
+        # draft-reduced size; draft preserves the aspect ratio)
+        width, height = img.size
+        target_height = int(height * target_width / width)
+
+        # Convert mode before resizing so only one intermediate buffer is built
+        if img.mode != "RGB":
+            img = img.convert("RGB")
+
+        if (width, height) != (target_width, target_height):
+            img = img.resize((target_width, target_height), Image.Resampling.LANCZOS)
+
+        # Write to a sibling tempfile and rename so a crash mid-save can
+        # never leave a truncated .jpg next to a deleted original.
+        # Baseline non-optimized Huffman keeps libjpeg-turbo on its fast path.
+        tmp_path = output_path.with_name(output_path.name + ".tmp")
+        try:
+            img.save(tmp_path, "JPEG", quality=85, optimize=False, progressive=False)
+        except Exception:
+            tmp_path.unlink(missing_ok=True)
+            raise
         img.close()
-        
+        os.replace(tmp_path, output_path)
+
         # Remove original file if different from output
         if image_path != output_path:
             image_path.unlink()
         
-        print(f"  Resized: {relative_path} ({original_width}x{original_height} -> {target_width}x{target_height})")
+        logger.debug(
+            "Resized: %s (%dx%d -> %dx%d)",
+            relative_path, original_width, original_height, target_width, target_height,
+        )
         return True
-        
+
     except Exception as e:
-        print(f"  Warning: Failed to process {relative_path}: {e}")
+        logger.warning("Failed to process %s: %s", relative_path, e)
         return False
 
 
-def resize_images_in_directory(folder_path: str, target_width: int) -> None:
+def resize_images_in_directory(folder_path: str, target_width: int, force_upscale: bool = False) -> None:
     folder = Path(folder_path)
     
     if not folder.exists():
@@ -67,25 +136,32 @@ def resize_images_in_directory(folder_path: str, target_width: int) -> None:
         sys.exit(1)
     
     # Find all image files in the folder and subfolders recursively
-    image_files = [
-        f for f in folder.rglob("*")
-        if f.is_file() and f.suffix.lower() in IMAGE_EXTENSIONS
-    ]
-    
+    image_files = list(find_image_files(folder))
+
     if not image_files:
         print(f"No images found in folder: {folder_path}")
         return
-    
-    # Sort by full path
-    image_files.sort(key=lambda p: str(p))
+
+    # Sort by full path (str is a C-level key, unlike a lambda)
+    image_files.sort(key=str)
     
     print(f"Found {len(image_files)} images in folder (including subfolders)...")
     print(f"Target width: {target_width}px\n")
     
-    processed_count = 0
-    for image_file in image_files:
-        if resize_image(image_file, folder, target_width):
-            processed_count += 1
+    # Resize files in parallel, one process per core; the progress bar is
+    # updated from the main process so workers never write to the terminal
+    with ProcessPoolExecutor(max_workers=os.cpu_count()) as executor:
+        results = executor.map(
+            partial(
+                resize_image,
+                base_folder=folder,
+                target_width=target_width,
+                force_upscale=force_upscale,
+            ),
+            image_files,
+            chunksize=8,
+        )
+        processed_count = sum(tqdm(results, total=len(image_files), unit="img"))
     
     print(f"\nDone! Processed {processed_count} images.")
 
@@ -103,14 +179,20 @@ def main():
         type=int,
         help="Target width in pixels"
     )
-    
+    parser.add_argument(
+        "--force-upscale",
+        action="store_true",
+        help="Also upscale images narrower than the target width"
+    )
+
     args = parser.parse_args()
     
     if args.width <= 0:
         print("Error: Width must be a positive integer.")
         sys.exit(1)
-    
-    resize_images_in_directory(args.folder, args.width)
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    resize_images_in_directory(args.folder, args.width, args.force_upscale)
 
 
 if __name__ == "__main__":